@@ -0,0 +1,83 @@
+"""Convert equity_curve to zlib-compressed BYTEA, add composite indexes
+
+Existing databases keep the JSONB column create_all() originally made,
+so the compressed-blob change in models.py needs this conversion:
+existing curves are converted from the old list-of-dicts shape to the
+struct-of-arrays shape the API serves now and recompressed row by row
+into a new BYTEA column, which then replaces the old one under the
+same name. The composite
+indexes from BacktestRun.__table_args__ are created here too, since
+create_all() never touches an existing table.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-08-26
+
+"""
+import json
+import zlib
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _to_columns(curve):
+    """Convert a legacy list-of-dicts curve to the struct-of-arrays shape
+    the API now serves; curves already in the new shape pass through."""
+    if not isinstance(curve, list):
+        return curve
+    return {
+        'dates': [point['date'] for point in curve],
+        'portfolio_values': [point['portfolio_value'] for point in curve],
+        'prices': [point['price'] for point in curve],
+        'sma': [point['sma'] for point in curve],
+    }
+
+
+def upgrade():
+    conn = op.get_bind()
+    op.add_column('backtest_runs', sa.Column('equity_curve_bytes', sa.LargeBinary(), nullable=True))
+
+    rows = conn.execute(sa.text(
+        "SELECT id, equity_curve FROM backtest_runs WHERE equity_curve IS NOT NULL"
+    )).all()
+    for run_id, curve in rows:
+        if isinstance(curve, (bytes, str)):
+            curve = json.loads(curve)
+        blob = zlib.compress(json.dumps(_to_columns(curve)).encode())
+        conn.execute(
+            sa.text("UPDATE backtest_runs SET equity_curve_bytes = :blob WHERE id = :run_id"),
+            {"blob": blob, "run_id": run_id},
+        )
+
+    op.drop_column('backtest_runs', 'equity_curve')
+    op.alter_column('backtest_runs', 'equity_curve_bytes', new_column_name='equity_curve')
+
+    op.create_index('ix_backtest_runs_user_created', 'backtest_runs', ['user_id', 'created_at'])
+    op.create_index('ix_backtest_runs_ticker_created', 'backtest_runs', ['ticker', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_backtest_runs_ticker_created', table_name='backtest_runs')
+    op.drop_index('ix_backtest_runs_user_created', table_name='backtest_runs')
+
+    conn = op.get_bind()
+    op.add_column('backtest_runs', sa.Column('equity_curve_json', sa.JSON(), nullable=True))
+
+    rows = conn.execute(sa.text(
+        "SELECT id, equity_curve FROM backtest_runs WHERE equity_curve IS NOT NULL"
+    )).all()
+    for run_id, blob in rows:
+        curve = json.dumps(json.loads(zlib.decompress(blob)))
+        conn.execute(
+            sa.text("UPDATE backtest_runs SET equity_curve_json = :curve WHERE id = :run_id"),
+            {"curve": curve, "run_id": run_id},
+        )
+
+    op.drop_column('backtest_runs', 'equity_curve')
+    op.alter_column('backtest_runs', 'equity_curve_json', new_column_name='equity_curve')
@@ -0,0 +1,246 @@
+"""Numba-compiled kernels for the backtest hot path.
+
+The rule strings from the API are encoded as small integers so the
+simulation loop stays inside nopython mode:
+
+    conditions: 0 = price > sma, 1 = price < sma, 2 = price >= sma, 3 = price <= sma
+    actions:    0 = buy, 1 = sell, 2 = hold
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        return wrap
+
+COND_GT = 0
+COND_LT = 1
+COND_GE = 2
+COND_LE = 3
+
+ACTION_BUY = 0
+ACTION_SELL = 1
+ACTION_HOLD = 2
+
+
+@njit(cache=True)
+def _sma(close, period):
+    """Rolling mean via a running sum; NaN for the warm-up bars."""
+    n = close.size
+    out = np.empty(n)
+    running = 0.0
+    for i in range(period - 1):
+        running += close[i]
+        out[i] = np.nan
+    running += close[period - 1]
+    out[period - 1] = running / period
+    for i in range(period, n):
+        running += close[i] - close[i - period]
+        out[i] = running / period
+    return out
+
+
+def _sma_numpy(close, period):
+    """O(N) rolling mean via the cumulative-sum trick; used without Numba."""
+    out = np.empty(close.size)
+    out[:period - 1] = np.nan
+    cs = np.cumsum(close)
+    out[period - 1] = cs[period - 1] / period
+    out[period:] = (cs[period:] - cs[:-period]) / period
+    return out
+
+
+if not HAVE_NUMBA:
+    # The interpreted running-sum loop would be the slowest path in the
+    # request; the vectorized cumsum version is a handful of C-level passes
+    _sma = _sma_numpy
+
+
+@njit(cache=True)
+def _simulate(close, sma, cond, then_action, else_action, commission, cash):
+    """Step through the bars with a single position, all-in sizing.
+
+    Returns the per-bar equity curve and the PnL of each closed trade
+    (an open position at the last bar is marked to market).
+    """
+    n = close.size
+    equity = np.empty(n)
+    trades_pnl = np.empty(n // 2 + 1)
+    shares = 0.0
+    entry_equity = 0.0
+    n_trades = 0
+
+    for i in range(n):
+        price = close[i]
+
+        if cond == COND_LT:
+            met = price < sma[i]
+        elif cond == COND_GE:
+            met = price >= sma[i]
+        elif cond == COND_LE:
+            met = price <= sma[i]
+        else:
+            met = price > sma[i]
+
+        action = then_action if met else else_action
+
+        if action == ACTION_BUY and shares == 0.0:
+            entry_equity = cash
+            shares = cash * (1.0 - commission) / price
+            cash = 0.0
+        elif action == ACTION_SELL and shares > 0.0:
+            cash = shares * price * (1.0 - commission)
+            shares = 0.0
+            trades_pnl[n_trades] = cash - entry_equity
+            n_trades += 1
+
+        equity[i] = cash + shares * price
+
+    if shares > 0.0:
+        trades_pnl[n_trades] = equity[n - 1] - entry_equity
+        n_trades += 1
+
+    return equity, trades_pnl[:n_trades]
+
+
+# Runtime-specialized simulators: the rule is baked into generated source
+# (comparison operator inlined, actions expanded, no per-bar dispatch) and
+# each variant is JIT-compiled once per process. The templates only ever
+# interpolate from these internal tables, never from request strings.
+_COND_OPS = {COND_GT: '>', COND_LT: '<', COND_GE: '>=', COND_LE: '<='}
+
+_ACTION_BLOCKS = {
+    ACTION_BUY: (
+        "            if shares == 0.0:\n"
+        "                entry_equity = cash\n"
+        "                shares = cash * (1.0 - commission) / price\n"
+        "                cash = 0.0\n"
+    ),
+    ACTION_SELL: (
+        "            if shares > 0.0:\n"
+        "                cash = shares * price * (1.0 - commission)\n"
+        "                shares = 0.0\n"
+        "                trades_pnl[n_trades] = cash - entry_equity\n"
+        "                n_trades += 1\n"
+    ),
+    ACTION_HOLD: "            pass\n",
+}
+
+_SIM_TEMPLATE = """\
+def _specialized(close, sma, commission, cash):
+    n = close.size
+    equity = np.empty(n)
+    trades_pnl = np.empty(n // 2 + 1)
+    shares = 0.0
+    entry_equity = 0.0
+    n_trades = 0
+
+    for i in range(n):
+        price = close[i]
+        if price {cond_op} sma[i]:
+{then_block}\
+        else:
+{else_block}\
+        equity[i] = cash + shares * price
+
+    if shares > 0.0:
+        trades_pnl[n_trades] = equity[n - 1] - entry_equity
+        n_trades += 1
+
+    return equity, trades_pnl[:n_trades]
+"""
+
+_specialized_cache = {}
+
+def specialized_simulator(cond, then_action, else_action):
+    """Return a simulator compiled for one (condition, then, else) combo.
+
+    At most 4 x 3 x 3 variants exist; each is generated and compiled on
+    first use and cached for the life of the process. Disk caching is
+    off because Numba can't cache exec'd source.
+    """
+    key = (cond, then_action, else_action)
+    simulate = _specialized_cache.get(key)
+    if simulate is None:
+        source = _SIM_TEMPLATE.format(
+            cond_op=_COND_OPS[cond],
+            then_block=_ACTION_BLOCKS[then_action],
+            else_block=_ACTION_BLOCKS[else_action],
+        )
+        namespace = {'np': np}
+        exec(source, namespace)
+        simulate = njit(cache=False)(namespace['_specialized'])
+        _specialized_cache[key] = simulate
+    return simulate
+
+
+@njit(cache=True, parallel=True)
+def _simulate_grid(close, smas, starts, cond_codes, then_codes, else_codes, commission, cash):
+    """Evaluate many (sma, rule) configs against one price series in parallel.
+
+    smas is one row per config, NaN over each config's warm-up; starts[j]
+    is the first bar where config j's SMA is defined. Returns per-config
+    summary stats instead of full equity curves.
+    """
+    n_cfg = cond_codes.size
+    finals = np.empty(n_cfg)
+    n_trades = np.empty(n_cfg, np.int64)
+    n_wins = np.empty(n_cfg, np.int64)
+    sharpes = np.empty(n_cfg)
+
+    for j in prange(n_cfg):
+        start = starts[j]
+        equity, trades_pnl = _simulate(
+            close[start:], smas[j, start:],
+            cond_codes[j], then_codes[j], else_codes[j],
+            commission, cash
+        )
+        finals[j] = equity[-1]
+        n_trades[j] = trades_pnl.size
+
+        wins = 0
+        for k in range(trades_pnl.size):
+            if trades_pnl[k] > 0:
+                wins += 1
+        n_wins[j] = wins
+
+        # Running sums instead of a per-config returns temporary
+        m = equity.size - 1
+        if m > 1:
+            total = 0.0
+            total_sq = 0.0
+            for i in range(m):
+                r = equity[i + 1] / equity[i] - 1.0
+                total += r
+                total_sq += r * r
+            mean = total / m
+            variance = total_sq / m - mean * mean
+            std = np.sqrt(variance) if variance > 0 else 0.0
+            sharpes[j] = mean / std * np.sqrt(252.0) if std != 0 else 0.0
+        else:
+            sharpes[j] = 0.0
+
+    return finals, n_trades, n_wins, sharpes
+
+
+# Warm the JIT cache at import so the first API request doesn't pay
+# the compilation cost.
+_warmup = np.array([1.0, 2.0, 3.0, 4.0])
+_simulate(_warmup, _sma(_warmup, 2), COND_GT, ACTION_BUY, ACTION_HOLD, 0.001, 10000.0)
+_simulate_grid(
+    _warmup, _sma(_warmup, 2).reshape(1, -1), np.array([1]),
+    np.array([COND_GT]), np.array([ACTION_BUY]), np.array([ACTION_HOLD]),
+    0.001, 10000.0
+)
+# The default specialized variant too — exec'd source can't use the disk
+# cache, so without this the most common rule would still JIT-compile on
+# the first request (forked workers inherit the warmed cache).
+specialized_simulator(COND_GT, ACTION_BUY, ACTION_HOLD)(_warmup, _sma(_warmup, 2), 0.001, 10000.0)
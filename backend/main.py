@@ -2,11 +2,15 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import asyncio
+import httpx
 import yfinance as yf
-import backtrader as bt
 import pandas as pd
 import numpy as np
+import os
 import time
 from typing import Dict, List, Any, Optional
 from sqlalchemy.orm import Session
@@ -15,7 +19,13 @@ from sqlalchemy.orm import Session
 # Import our database models
 from models import (
     get_db, BacktestRepository, UserRepository, User, BacktestRun,
-    create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, create_tables
+    create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, create_tables,
+    decompress_curve
+)
+from kernels import (
+    _sma, _simulate_grid, specialized_simulator,
+    COND_GT, COND_LT, COND_GE, COND_LE,
+    ACTION_BUY, ACTION_SELL, ACTION_HOLD
 )
 
 # Initialize database
@@ -23,6 +33,29 @@ create_tables()
 
 app = FastAPI(title="Stock Strategy Backtester API", version="1.0.0")
 
+# CPU-bound backtests run in worker processes so the event loop stays free;
+# falls back to the default thread pool while the pool isn't up
+process_pool: Optional[ProcessPoolExecutor] = None
+
+# One AsyncClient for all Yahoo requests, so TCP/TLS setup is paid once
+http_client: Optional[httpx.AsyncClient] = None
+
+@app.on_event("startup")
+async def start_workers():
+    global process_pool, http_client
+    process_pool = ProcessPoolExecutor(max_workers=int(os.getenv("BACKTEST_WORKERS", "2")))
+    http_client = httpx.AsyncClient(
+        timeout=30.0,
+        headers={"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36"}
+    )
+
+@app.on_event("shutdown")
+async def stop_workers():
+    if process_pool is not None:
+        process_pool.shutdown(wait=False)
+    if http_client is not None:
+        await http_client.aclose()
+
 # Security
 security = HTTPBearer()
 
@@ -47,16 +80,46 @@ class BacktestRequest(BaseModel):
     end_date: str
     sma_period: int
     rule: Rule
+    # Cap on equity-curve points returned inline; the full series is
+    # available paginated via GET /backtest/{id}/equity-curve
+    max_points: int = 1000
+
+class EquityCurve(BaseModel):
+    # Struct-of-arrays: four parallel columns instead of a list of per-bar
+    # dicts, so the JSON payload doesn't repeat the key strings every bar
+    dates: List[str]
+    portfolio_values: List[float]
+    prices: List[float]
+    sma: List[float]
 
 class BacktestResponse(BaseModel):
     total_return: float
     win_rate: float
     number_of_trades: int
-    equity_curve: List[Dict[str, Any]]
+    equity_curve: EquityCurve
     final_portfolio_value: float
     sharpe_ratio: float
     backtest_id: Optional[int] = None
 
+class GridConfig(BaseModel):
+    sma_period: int
+    rule: Rule
+
+class GridBacktestRequest(BaseModel):
+    ticker: str
+    start_date: str
+    end_date: str
+    configs: List[GridConfig]
+
+class GridResult(BaseModel):
+    sma_period: int
+    rule: Rule
+    total_return: float
+    win_rate: float
+    number_of_trades: int
+    final_portfolio_value: float
+    sharpe_ratio: float
+
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
@@ -74,11 +137,23 @@ class PaymentRequest(BaseModel):
     amount: int  # in cents
     currency: str = "usd"
 
-# Authentication dependency
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    from jose import JWTError, jwt
+# Authentication dependency. Decoded tokens are cached (HMAC verification
+# of a token we've already seen is pure waste) with expiry re-checked on
+# every hit; the user row is cached briefly to skip the per-request SELECT.
+@lru_cache(maxsize=4096)
+def _decode_token(token: str) -> tuple:
+    from jose import jwt
     from models import SECRET_KEY, ALGORITHM
-    
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    return payload.get("sub"), payload.get("exp")
+
+_user_cache: Dict[str, tuple] = {}
+USER_CACHE_TTL_SECONDS = 30
+USER_CACHE_SIZE = 1024
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    from jose import JWTError
+
     try:
         token = credentials.credentials
         credentials_exception = HTTPException(
@@ -86,22 +161,33 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Could not validate credentials. Please provide a valid Bearer token.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        
+
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            email: str = payload.get("sub")
+            email, token_exp = _decode_token(token)
             if email is None:
                 raise credentials_exception
+            # The cached decode skips jose's expiry validation, so re-check
+            if token_exp is not None and token_exp < time.time():
+                raise credentials_exception
         except JWTError as e:
             print(f"JWT Error: {str(e)}")
             raise credentials_exception
-        
+
+        cached = _user_cache.get(email)
+        if cached is not None and time.time() < cached[1]:
+            # Re-attach the cached instance to this request's session
+            return db.merge(cached[0], load=False)
+
         user_repo = UserRepository(db)
         user = user_repo.get_user_by_email(email=email)
         if user is None:
             raise credentials_exception
+
+        if len(_user_cache) >= USER_CACHE_SIZE:
+            _user_cache.pop(next(iter(_user_cache)))
+        _user_cache[email] = (user, time.time() + USER_CACHE_TTL_SECONDS)
         return user
-        
+
     except HTTPException:
         raise
     except Exception as e:
@@ -111,68 +197,67 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail=f"Authentication service error: {str(e)}"
         )
 
-# Backtrader Strategy (same as before)
-class SMAStrategy(bt.Strategy):
-    params = (
-        ('sma_period', 10),
-        ('rule', None),
-    )
-    
-    def __init__(self):
-        self.sma = bt.indicators.SimpleMovingAverage(
-            self.data.close, period=self.params.sma_period
-        )
-        self.trades = []
-        self.equity_curve = []
-        
-    def next(self):
-        current_price = self.data.close[0]
-        sma_value = self.sma[0]
-        
-        self.equity_curve.append({
-            'date': self.data.datetime.date(0).isoformat(),
-            'portfolio_value': self.broker.getvalue(),
-            'price': current_price,
-            'sma': sma_value
-        })
-        
-        condition_met = self._evaluate_condition(current_price, sma_value)
-        
-        if condition_met:
-            action = self.params.rule.then_action
-        else:
-            action = self.params.rule.else_action
-            
-        if action == "buy" and not self.position:
-            self.buy()
-        elif action == "sell" and self.position:
-            self.sell()
-        
-    def _evaluate_condition(self, price, sma):
-        condition = self.params.rule.if_condition.lower()
-        
-        if "price > sma" in condition:
-            return price > sma
-        elif "price < sma" in condition:
-            return price < sma
-        elif "price >= sma" in condition:
-            return price >= sma
-        elif "price <= sma" in condition:
-            return price <= sma
-        else:
-            return price > sma
-    
-    def notify_trade(self, trade):
-        if trade.isclosed:
-            self.trades.append({
-                'entry_date': trade.dtopen,
-                'exit_date': trade.dtclose,
-                'pnl': trade.pnl,
-                'pnl_net': trade.pnlcomm
-            })
+# Windows that end before today are immutable and cached in-process and
+# on disk; windows ending today or later would pin a truncated intraday
+# snapshot, so they are never cached
+_data_cache: Dict[tuple, pd.DataFrame] = {}
+DATA_CACHE_SIZE = 512
+DATA_CACHE_DIR = os.getenv("DATA_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".data_cache"))
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+
+def _is_immutable_window(end_date: str) -> bool:
+    try:
+        return datetime.strptime(end_date, "%Y-%m-%d").date() < datetime.now(timezone.utc).date()
+    except ValueError:
+        return False
 
+def _cache_file_path(cache_key: tuple) -> str:
+    ticker, start_date, end_date = cache_key
+    return os.path.join(DATA_CACHE_DIR, f"{ticker.replace('/', '_')}_{start_date}_{end_date}.pkl")
+
+def _get_cached_data(cache_key: tuple) -> Optional[pd.DataFrame]:
+    if not _is_immutable_window(cache_key[2]):
+        return None
+
+    cached = _data_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    cache_file = _cache_file_path(cache_key)
+    if os.path.exists(cache_file):
+        try:
+            data = pd.read_pickle(cache_file)
+            _remember_data(cache_key, data)
+            return data
+        except Exception as e:
+            print(f"Cache read failed for {cache_file}: {str(e)}")
+    return None
+
+def _remember_data(cache_key: tuple, data: pd.DataFrame):
+    if len(_data_cache) >= DATA_CACHE_SIZE:
+        _data_cache.pop(next(iter(_data_cache)))
+    _data_cache[cache_key] = data
+
+def _store_cached_data(cache_key: tuple, data: pd.DataFrame):
+    if not _is_immutable_window(cache_key[2]):
+        return
+
+    _remember_data(cache_key, data)
+    cache_file = _cache_file_path(cache_key)
+    try:
+        os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+        data.to_pickle(cache_file)
+    except Exception as e:
+        print(f"Cache write failed for {cache_file}: {str(e)}")
 
 def download_stock_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    cache_key = (ticker.upper(), start_date, end_date)
+
+    cached = _get_cached_data(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         print(f"Downloading data for: {ticker} from {start_date} to {end_date}")
         stock = yf.Ticker(ticker)
@@ -182,45 +267,243 @@ def download_stock_data(ticker: str, start_date: str, end_date: str) -> pd.DataF
             raise ValueError(f"No data found for ticker '{ticker}' - it may be delisted or there may be a network issue.")
 
         print("Downloaded data (head):", data.head())
+
+        _store_cached_data(cache_key, data)
         return data
 
     except Exception as e:
         print("Error details:", str(e))
         raise HTTPException(status_code=400, detail=f"Error downloading data: {str(e)}")
 
+async def download_stock_data_async(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """Fetch daily bars from Yahoo's chart endpoint over the shared
+    AsyncClient; falls back to the sync yfinance path on any failure."""
+    cache_key = (ticker.upper(), start_date, end_date)
+
+    cached = _get_cached_data(cache_key)
+    if cached is not None:
+        return cached
+
+    loop = asyncio.get_running_loop()
+    if http_client is None:
+        return await loop.run_in_executor(None, download_stock_data, ticker, start_date, end_date)
+
+    try:
+        period1 = int(datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+        period2 = int(datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+        response = await http_client.get(
+            YAHOO_CHART_URL.format(ticker=ticker),
+            params={"period1": period1, "period2": period2, "interval": "1d", "events": "history"}
+        )
+        response.raise_for_status()
+
+        chart = response.json()['chart']['result'][0]
+        indicators = chart['indicators']
+        quote = indicators['quote'][0]
+
+        # Use the split/dividend-adjusted close so this path matches the
+        # yfinance fallback (auto_adjust=True); the raw quote close jumps
+        # across splits and would feed false crossovers into the SMA
+        adjclose = indicators.get('adjclose')
+        close = adjclose[0].get('adjclose') if adjclose else None
+        if close is None:
+            close = quote['close']
+
+        data = pd.DataFrame(
+            {
+                'Open': quote['open'],
+                'High': quote['high'],
+                'Low': quote['low'],
+                'Close': close,
+                'Volume': quote['volume']
+            },
+            index=pd.to_datetime(chart['timestamp'], unit='s')
+        ).dropna(subset=['Close'])
+
+        if data.empty:
+            raise ValueError(f"No data found for ticker '{ticker}' - it may be delisted or there may be a network issue.")
+
+        _store_cached_data(cache_key, data)
+        return data
+
+    except Exception as e:
+        print(f"Async download failed for {ticker}, falling back to yfinance: {str(e)}")
+        return await loop.run_in_executor(None, download_stock_data, ticker, start_date, end_date)
+
+# Rule strings resolve through table lookups, not repeated substring scans
+CONDITION_CODES = {
+    'price > sma': COND_GT,
+    'price < sma': COND_LT,
+    'price >= sma': COND_GE,
+    'price <= sma': COND_LE,
+}
+ACTION_CODES = {'buy': ACTION_BUY, 'sell': ACTION_SELL, 'hold': ACTION_HOLD}
+
+def rule_codes(rule: Rule) -> tuple:
+    """Translate a Rule into the int codes the kernels understand."""
+    condition = rule.if_condition.strip().lower()
+    cond_code = CONDITION_CODES.get(condition)
+    if cond_code is None:
+        # Free-form strings like "if price < sma then sell" resolved the
+        # way the original substring matching did; default stays >
+        for phrase, code in CONDITION_CODES.items():
+            if phrase in condition:
+                cond_code = code
+                break
+        else:
+            cond_code = COND_GT
+    then_code = ACTION_CODES.get(rule.then_action, ACTION_HOLD)
+    else_code = ACTION_CODES.get(rule.else_action, ACTION_HOLD)
+    return cond_code, then_code, else_code
+
 def run_backtest(data: pd.DataFrame, sma_period: int, rule: Rule) -> Dict:
-    data_feed = bt.feeds.PandasData(dataname=data)
-    cerebro = bt.Cerebro()
-    cerebro.addstrategy(SMAStrategy, sma_period=sma_period, rule=rule)
-    cerebro.adddata(data_feed)
-    
     initial_cash = 10000
-    cerebro.broker.setcash(initial_cash)
-    cerebro.broker.setcommission(commission=0.001)
-    
-    strategies = cerebro.run()
-    strategy = strategies[0]
-    
-    final_value = cerebro.broker.getvalue()
+    commission = 0.001
+
+    if sma_period < 1:
+        raise ValueError(f"SMA period must be at least 1, got {sma_period}")
+
+    close = data['Close'].to_numpy(dtype=np.float64)
+    if close.size <= sma_period:
+        raise ValueError(f"Not enough data points ({close.size}) for SMA period {sma_period}")
+
+    sma = _sma(close, sma_period)
+
+    # Skip the warm-up bars where the SMA is undefined (same as Backtrader's minperiod)
+    start = sma_period - 1
+    close = close[start:]
+    sma = sma[start:]
+    dates = data.index[start:]
+
+    cond_code, then_code, else_code = rule_codes(rule)
+
+    simulate = specialized_simulator(cond_code, then_code, else_code)
+    equity, trade_pnl = simulate(close, sma, commission, float(initial_cash))
+
+    final_value = equity[-1]
     total_return = ((final_value - initial_cash) / initial_cash) * 100
-    
-    winning_trades = len([t for t in strategy.trades if t['pnl'] > 0])
-    total_trades = len(strategy.trades)
+
+    winning_trades = int(np.count_nonzero(trade_pnl > 0))
+    total_trades = int(trade_pnl.size)
     win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-    
-    equity_values = [point['portfolio_value'] for point in strategy.equity_curve]
-    returns = np.diff(equity_values) / equity_values[:-1]
-    sharpe_ratio = np.mean(returns) / np.std(returns) * np.sqrt(252) if np.std(returns) != 0 else 0
-    
+
+    # Bar-to-bar equity returns computed in place, no intermediate copies
+    equity_returns = np.empty(equity.size - 1)
+    np.subtract(equity[1:], equity[:-1], out=equity_returns)
+    equity_returns /= equity[:-1]
+    returns_std = equity_returns.std()
+    sharpe_ratio = equity_returns.mean() / returns_std * np.sqrt(252) if returns_std != 0 else 0
+
+    # Serialize each column in one shot; no per-bar dict construction
+    equity_curve = {
+        'dates': dates.strftime('%Y-%m-%d').tolist(),
+        'portfolio_values': equity.tolist(),
+        'prices': close.tolist(),
+        'sma': sma.tolist()
+    }
+
     return {
-        'total_return': round(total_return, 2),
+        'total_return': round(float(total_return), 2),
         'win_rate': round(win_rate, 2),
         'number_of_trades': total_trades,
-        'equity_curve': strategy.equity_curve,
-        'final_portfolio_value': round(final_value, 2),
-        'sharpe_ratio': round(sharpe_ratio, 2)
+        'equity_curve': equity_curve,
+        'final_portfolio_value': round(float(final_value), 2),
+        'sharpe_ratio': round(float(sharpe_ratio), 2)
     }
 
+def run_grid_backtest(data: pd.DataFrame, configs: List[GridConfig]) -> List[Dict]:
+    initial_cash = 10000
+    commission = 0.001
+
+    min_period = min(config.sma_period for config in configs)
+    if min_period < 1:
+        raise ValueError(f"SMA period must be at least 1, got {min_period}")
+
+    close = data['Close'].to_numpy(dtype=np.float64)
+    max_period = max(config.sma_period for config in configs)
+    if close.size <= max_period:
+        raise ValueError(f"Not enough data points ({close.size}) for SMA period {max_period}")
+
+    # One SMA per unique period, shared by every config that uses it
+    sma_by_period = {p: _sma(close, p) for p in {config.sma_period for config in configs}}
+    smas = np.stack([sma_by_period[config.sma_period] for config in configs])
+    starts = np.array([config.sma_period - 1 for config in configs])
+
+    codes = [rule_codes(config.rule) for config in configs]
+    cond_codes = np.array([c[0] for c in codes])
+    then_codes = np.array([c[1] for c in codes])
+    else_codes = np.array([c[2] for c in codes])
+
+    finals, n_trades, n_wins, sharpes = _simulate_grid(
+        close, smas, starts, cond_codes, then_codes, else_codes,
+        commission, float(initial_cash)
+    )
+
+    results = []
+    for j, config in enumerate(configs):
+        total_trades = int(n_trades[j])
+        winning_trades = int(n_wins[j])
+        results.append({
+            'sma_period': config.sma_period,
+            'rule': config.rule,
+            'total_return': round(float((finals[j] - initial_cash) / initial_cash * 100), 2),
+            'win_rate': round(winning_trades / total_trades * 100, 2) if total_trades > 0 else 0,
+            'number_of_trades': total_trades,
+            'final_portfolio_value': round(float(finals[j]), 2),
+            'sharpe_ratio': round(float(sharpes[j]), 2)
+        })
+    return results
+
+# Identical requests produce identical results, so memoize run_backtest
+# output by the request parameters (bounded, oldest-entry eviction)
+_result_cache: Dict[tuple, Dict] = {}
+RESULT_CACHE_SIZE = 256
+
+def _backtest_cache_key(request: BacktestRequest) -> tuple:
+    return (
+        request.ticker.upper(), request.start_date, request.end_date,
+        request.sma_period, request.rule.if_condition,
+        request.rule.then_action, request.rule.else_action
+    )
+
+def downsample_curve(curve: Dict, max_points: int) -> Dict:
+    """Thin the equity-curve columns to at most max_points, keeping the last bar."""
+    n = len(curve['dates'])
+    if max_points <= 0 or n <= max_points:
+        return curve
+
+    step = -(-n // max_points)  # ceil division
+    idx = list(range(0, n, step))
+    if idx[-1] != n - 1:
+        idx.append(n - 1)
+    return {key: [column[i] for i in idx] for key, column in curve.items()}
+
+async def run_backtest_cached(request: BacktestRequest) -> Dict:
+    # Windows ending today or later aren't memoized either, for the same
+    # reason the download cache skips them
+    cacheable = _is_immutable_window(request.end_date)
+
+    cache_key = _backtest_cache_key(request)
+    if cacheable:
+        results = _result_cache.get(cache_key)
+        if results is not None:
+            return results
+
+    # Non-blocking download; the CPU-bound simulation goes to a worker
+    # process, so neither stalls other requests
+    stock_data = await download_stock_data_async(request.ticker, request.start_date, request.end_date)
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        process_pool, run_backtest, stock_data, request.sma_period, request.rule
+    )
+
+    if cacheable:
+        if len(_result_cache) >= RESULT_CACHE_SIZE:
+            _result_cache.pop(next(iter(_result_cache)))
+        _result_cache[cache_key] = results
+    return results
+
 # Routes
 @app.get("/")
 async def root():
@@ -239,16 +522,11 @@ async def test_backtest_strategy(request: BacktestRequest):
         
         if start_date >= end_date:
             raise HTTPException(status_code=400, detail="Start date must be before end date")
-        
-        # Download stock data
-        stock_data = download_stock_data(request.ticker, request.start_date, request.end_date)
-        
-        print(stock_data)
 
-        # Run backtest
-        results = run_backtest(stock_data, request.sma_period, request.rule)
-        print(results)
-        
+        # Download data and run backtest (memoized)
+        results = await run_backtest_cached(request)
+        results = {**results, 'equity_curve': downsample_curve(results['equity_curve'], request.max_points)}
+
         # Note: Not saving to database for test endpoint
         return BacktestResponse(**results)
         
@@ -270,8 +548,9 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
                 detail="Email already registered"
             )
         
-        # Create user
-        db_user = user_repo.create_user(user.email, user.password)
+        # Create user (bcrypt hashing runs in a thread so the ~250ms of
+        # hashing doesn't stall the event loop)
+        db_user = await asyncio.to_thread(user_repo.create_user, user.email, user.password)
         
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -295,7 +574,8 @@ async def login_user(user: UserLogin, db: Session = Depends(get_db)):
     try:
         user_repo = UserRepository(db)
         
-        db_user = user_repo.authenticate_user(user.email, user.password)
+        # Hash verification in a thread, same as registration
+        db_user = await asyncio.to_thread(user_repo.authenticate_user, user.email, user.password)
         if not db_user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -335,13 +615,10 @@ async def backtest_strategy(
         
         if start_date >= end_date:
             raise HTTPException(status_code=400, detail="Start date must be before end date")
-        
-        # Download stock data
-        stock_data = download_stock_data(request.ticker, request.start_date, request.end_date)
-        
-        # Run backtest
-        results = run_backtest(stock_data, request.sma_period, request.rule)
-        
+
+        # Download data and run backtest (memoized)
+        results = await run_backtest_cached(request)
+
         # Save to database
         backtest_repo = BacktestRepository(db)
         execution_time = time.time() - start_time
@@ -351,14 +628,19 @@ async def backtest_strategy(
             'start_date': request.start_date,
             'end_date': request.end_date,
             'sma_period': request.sma_period,
-            'rule': request.rule.dict(),
+            'rule': request.rule.model_dump(),
             'results': results,
             'execution_time': execution_time
         }
         
         saved_backtest = backtest_repo.save_backtest_run(backtest_data, current_user.id)
-        
-        return BacktestResponse(**results, backtest_id=saved_backtest.id)
+
+        # Full curve goes to the database; the inline response is capped
+        response_results = {
+            **results,
+            'equity_curve': downsample_curve(results['equity_curve'], request.max_points)
+        }
+        return BacktestResponse(**response_results, backtest_id=saved_backtest.id)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -366,6 +648,36 @@ async def backtest_strategy(
         print(f"Backtest error: {str(e)}")  # Log the actual error
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.post("/backtest/grid", response_model=List[GridResult])
+async def grid_backtest_strategy(
+    request: GridBacktestRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Evaluate many (sma_period, rule) configs against one downloaded
+    price series instead of N sequential /backtest calls."""
+    try:
+        start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
+        end_date = datetime.strptime(request.end_date, "%Y-%m-%d")
+
+        if start_date >= end_date:
+            raise HTTPException(status_code=400, detail="Start date must be before end date")
+        if not request.configs:
+            raise HTTPException(status_code=400, detail="At least one config is required")
+
+        stock_data = await download_stock_data_async(request.ticker, request.start_date, request.end_date)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            process_pool, run_grid_backtest, stock_data, request.configs
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Grid backtest error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 @app.get("/backtest/history")
 async def get_backtest_history(
     db: Session = Depends(get_db),
@@ -391,17 +703,58 @@ async def get_backtest_history(
         ]
     }
 
+@app.get("/backtest/{backtest_id}/equity-curve")
+async def get_backtest_equity_curve(
+    backtest_id: int,
+    offset: int = 0,
+    limit: int = 500,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Paginated window into a stored equity curve, so large runs don't
+    have to come back inline with the backtest response."""
+    run = db.query(BacktestRun).filter(
+        BacktestRun.id == backtest_id,
+        BacktestRun.user_id == current_user.id
+    ).first()
+    if run is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+
+    curve = decompress_curve(run.equity_curve) or {}
+    total_points = len(curve.get('dates', []))
+    window = {key: column[offset:offset + limit] for key, column in curve.items()}
+
+    return {
+        "backtest_id": backtest_id,
+        "offset": offset,
+        "limit": limit,
+        "total_points": total_points,
+        "equity_curve": window
+    }
+
+# The popular-tickers aggregation is expensive and tolerates staleness,
+# so serve it from a short-lived in-process cache
+_popular_tickers_cache = {'expires_at': 0.0, 'data': None}
+POPULAR_TICKERS_TTL_SECONDS = 300
+
 @app.get("/analytics/popular-tickers")
 async def get_popular_tickers(db: Session = Depends(get_db)):
+    now = time.time()
+    if _popular_tickers_cache['data'] is not None and now < _popular_tickers_cache['expires_at']:
+        return _popular_tickers_cache['data']
+
     backtest_repo = BacktestRepository(db)
     popular = backtest_repo.get_popular_tickers(limit=10)
-    
-    return {
+
+    response = {
         "popular_tickers": [
             {"ticker": ticker, "count": count}
             for ticker, count in popular
         ]
     }
+    _popular_tickers_cache['data'] = response
+    _popular_tickers_cache['expires_at'] = now + POPULAR_TICKERS_TTL_SECONDS
+    return response
 
 @app.post("/payment/create-intent")
 async def create_payment_intent(
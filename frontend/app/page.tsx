@@ -43,12 +43,12 @@ interface BacktestResult {
   total_return: number;
   win_rate: number;
   number_of_trades: number;
-  equity_curve: Array<{
-    date: string;
-    portfolio_value: number;
-    price: number;
-    sma: number;
-  }>;
+  equity_curve: {
+    dates: string[];
+    portfolio_values: number[];
+    prices: number[];
+    sma: number[];
+  };
   final_portfolio_value: number;
   sharpe_ratio: number;
 }
@@ -136,11 +136,11 @@ export default function BacktesterPage() {
 
   const chartData = results
     ? {
-        labels: results.equity_curve.map((point) => point.date),
+        labels: results.equity_curve.dates,
         datasets: [
           {
             label: "Portfolio Value",
-            data: results.equity_curve.map((point) => point.portfolio_value),
+            data: results.equity_curve.portfolio_values,
             borderColor: "#0ea5e9",
             backgroundColor: "rgba(14, 165, 233, 0.1)",
             borderWidth: 3,
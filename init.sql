@@ -37,7 +37,7 @@ CREATE TABLE IF NOT EXISTS backtest_runs (
     number_of_trades INTEGER NOT NULL,
     final_portfolio_value DECIMAL(15,2) NOT NULL,
     sharpe_ratio DECIMAL(8,4) NOT NULL,
-    equity_curve JSONB,
+    equity_curve BYTEA,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     execution_time_seconds DECIMAL(8,3)
 );
@@ -48,6 +48,11 @@ CREATE INDEX IF NOT EXISTS idx_backtest_runs_ticker ON backtest_runs(ticker);
 CREATE INDEX IF NOT EXISTS idx_backtest_runs_created_at ON backtest_runs(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 
+-- Composite indexes for the hot query shapes (history by user+recency,
+-- analytics by ticker) — keep in sync with models.BacktestRun.__table_args__
+CREATE INDEX IF NOT EXISTS ix_backtest_runs_user_created ON backtest_runs(user_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_backtest_runs_ticker_created ON backtest_runs(ticker, created_at);
+
 -- Insert sample data (optional)
 INSERT INTO users (email, hashed_password, is_premium) VALUES 
 ('demo@example.com', '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW', TRUE)